@@ -251,6 +251,11 @@ CMD_SUFFIX = environ.get("CMD_SUFFIX", "")
 TORRENT_TIMEOUT = environ.get("TORRENT_TIMEOUT", "")
 TORRENT_TIMEOUT = 3000 if len(TORRENT_TIMEOUT) == 0 else int(TORRENT_TIMEOUT)
 
+GDRIVE_UPLOAD_WORKERS = environ.get("GDRIVE_UPLOAD_WORKERS", "")
+GDRIVE_UPLOAD_WORKERS = (
+    4 if len(GDRIVE_UPLOAD_WORKERS) == 0 else int(GDRIVE_UPLOAD_WORKERS)
+)
+
 QUEUE_ALL = environ.get("QUEUE_ALL", "")
 QUEUE_ALL = "" if len(QUEUE_ALL) == 0 else int(QUEUE_ALL)
 
@@ -367,6 +372,7 @@ config_dict = {
     "IMAGES": IMAGES,
     "EXTENSION_FILTER": EXTENSION_FILTER,
     "GDRIVE_ID": GDRIVE_ID,
+    "GDRIVE_UPLOAD_WORKERS": GDRIVE_UPLOAD_WORKERS,
     "ATTACHMENT_URL": ATTACHMENT_URL,
     "INDEX_URL": INDEX_URL,
     "LEECH_LOG_ID": LEECH_LOG_ID,
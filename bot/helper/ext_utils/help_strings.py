@@ -97,6 +97,7 @@ bset_display_dict = {
     "MIRROR_LOG_ID": "Chat ID where mirror files would be sent. Int. NOTE: Only available for superGroup/channel. Add -100 before the channel/superGroup ID. In short, don't add bot ID or your ID! For multiple IDs, separate them by space.",
     "EXTENSION_FILTER": "File extensions that won't be uploaded/cloned. Separate them by space.",
     "GDRIVE_ID": "This is the Folder/TeamDrive ID of Google Drive or root to which you want to upload all the mirrors using google-api-python-client.",
+    "GDRIVE_UPLOAD_WORKERS": "Number of files uploaded in parallel while uploading a folder to Google Drive. Keep it low to stay under the Drive write rate limit. Default is 4. Int",
     "INDEX_URL": "Refer to https://gitlab.com/ParveenBhadooOfficial/Google-Drive-Index.",
     "SHOW_MEDIAINFO": "Add a button to show MediaInfo in leeched files. Bool",
     "TOKEN_TIMEOUT": "Token timeout for each group member in seconds. Int",
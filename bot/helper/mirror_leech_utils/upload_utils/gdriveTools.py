@@ -2,26 +2,39 @@ import contextlib
 from io import FileIO
 from os import path as ospath
 from os import remove as osremove
-from os import listdir, makedirs
+from os import listdir, scandir, makedirs
 from re import search as re_search
-from time import time
+from json import JSONDecodeError, loads
+from mmap import PAGESIZE, ACCESS_READ, MADV_WILLNEED, MADV_SEQUENTIAL, mmap
+from time import time, sleep
+from queue import Queue
 from pickle import load as pload
-from random import randrange
+from random import random, randrange
 from logging import ERROR, getLogger
+from threading import Lock, Thread, local
+from collections import deque
 from urllib.parse import quote as rquote
 from urllib.parse import parse_qs, urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from httplib2 import Response
 from tenacity import (
     RetryError,
     retry,
     wait_exponential,
+    retry_if_exception,
     stop_after_attempt,
     retry_if_exception_type,
+    wait_random_exponential,
 )
 from google.oauth2 import service_account
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
+from requests.adapters import HTTPAdapter
+from requests.exceptions import Timeout
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload
 from googleapiclient.errors import HttpError
 from googleapiclient.discovery import build
+from google.auth.transport.requests import AuthorizedSession
 
 from bot import GLOBAL_EXTENSION_FILTER, config_dict, list_drives_dict
 from bot.helper.aeon_utils.metadata import add_attachment
@@ -36,16 +49,98 @@ from bot.helper.ext_utils.files_utils import process_file, get_mime_type
 LOGGER = getLogger(__name__)
 getLogger("googleapiclient.discovery").setLevel(ERROR)
 
+TRANSIENT_STATUSES = frozenset({429, 500, 502, 503, 504})
+QUOTA_REASONS = frozenset({"userRateLimitExceeded", "dailyLimitExceeded"})
+DOWNLOAD_QUOTA_REASONS = frozenset({"downloadQuotaExceeded", "dailyLimitExceeded"})
+# connect and read timeouts, the read one matching httplib2's default socket timeout
+HTTP_TIMEOUT = (10, 60)
+# in-place retries for one chunk before the whole upload is handed to tenacity
+CHUNK_RETRIES = 5
+
+
+def is_transient_error(err):
+    if isinstance(err, HttpError):
+        return err.resp.status in TRANSIENT_STATUSES
+    return isinstance(
+        err, ConnectionError | TimeoutError | RequestsConnectionError | Timeout
+    )
+
+
+class PooledHttp:
+    """httplib2-like transport that keeps Drive connections alive in a pool."""
+
+    def __init__(self, credentials):
+        self.credentials = credentials
+        self.__session = AuthorizedSession(credentials)
+        self.__session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=0),
+        )
+
+    def request(self, uri, method="GET", body=None, headers=None, **_):
+        # resumable chunks answer with 308, which must not be followed
+        response = self.__session.request(
+            method,
+            uri,
+            data=body,
+            headers=headers,
+            timeout=HTTP_TIMEOUT,
+            allow_redirects=method != "PUT",
+        )
+        info = dict(response.headers)
+        info["status"] = response.status_code
+        return Response(info), response.content
+
+    def close(self):
+        self.__session.close()
+
 
 class GoogleDriveHelper:
+    __slots__ = (
+        "__G_DRIVE_BASE_DOWNLOAD_URL",
+        "__G_DRIVE_DIR_BASE_DOWNLOAD_URL",
+        "__G_DRIVE_DIR_MIME_TYPE",
+        "__OAUTH_SCOPE",
+        "__alt_auth",
+        "__delete_queue",
+        "__extension_filter",
+        "__file_processed_bytes",
+        "__is_cancelled",
+        "__is_cloning",
+        "__is_downloading",
+        "__is_errored",
+        "__is_stopped",
+        "__is_uploading",
+        "__listener",
+        "__path",
+        "__processed_bytes",
+        "__processed_lock",
+        "__sa_count",
+        "__sa_index",
+        "__sa_lock",
+        "__sa_number",
+        "__service",
+        "__start_time",
+        "__status",
+        "__thread_data",
+        "__total_bytes",
+        "__total_files",
+        "__total_folders",
+        "__total_time",
+        "__update_interval",
+        "__updater",
+        "__user_id",
+        "name",
+    )
+
     def __init__(self, name=None, path=None, listener=None):
         self.__OAUTH_SCOPE = ["https://www.googleapis.com/auth/drive"]
         self.__G_DRIVE_DIR_MIME_TYPE = "application/vnd.google-apps.folder"
         self.__G_DRIVE_BASE_DOWNLOAD_URL = (
-            "https://drive.google.com/uc?id={}&export=download"
+            "https://drive.google.com/uc?id=%s&export=download"
         )
         self.__G_DRIVE_DIR_BASE_DOWNLOAD_URL = (
-            "https://drive.google.com/drive/folders/{}"
+            "https://drive.google.com/drive/folders/%s"
         )
         self.__listener = listener
         self.__user_id = listener.message.from_user.id if listener else None
@@ -62,13 +157,21 @@ class GoogleDriveHelper:
         self.__is_cloning = False
         self.__is_cancelled = False
         self.__is_errored = False
+        self.__is_stopped = False
         self.__status = None
         self.__updater = None
         self.__update_interval = 3
         self.__sa_index = 0
         self.__sa_count = 1
         self.__sa_number = 100
+        self.__sa_lock = Lock()
+        self.__extension_filter = frozenset(
+            x.lower().lstrip(".") for x in GLOBAL_EXTENSION_FILTER
+        )
         self.__service = self.__authorize()
+        self.__thread_data = local()
+        self.__processed_lock = Lock()
+        self.__delete_queue = Queue()
         self.__file_processed_bytes = 0
         self.__processed_bytes = 0
         self.name = name
@@ -84,17 +187,16 @@ class GoogleDriveHelper:
     def processed_bytes(self):
         return self.__processed_bytes
 
-    def __authorize(self):
+    def __authorize(self, sa_index=None):
         credentials = None
         if config_dict["USE_SERVICE_ACCOUNTS"]:
             json_files = listdir("accounts")
-            self.__sa_number = len(json_files)
-            self.__sa_index = randrange(self.__sa_number)
-            LOGGER.info(
-                f"Authorizing with {json_files[self.__sa_index]} service account"
-            )
+            if sa_index is None:
+                self.__sa_number = len(json_files)
+                self.__sa_index = sa_index = randrange(self.__sa_number)
+            LOGGER.info(f"Authorizing with {json_files[sa_index]} service account")
             credentials = service_account.Credentials.from_service_account_file(
-                f"accounts/{json_files[self.__sa_index]}", scopes=self.__OAUTH_SCOPE
+                f"accounts/{json_files[sa_index]}", scopes=self.__OAUTH_SCOPE
             )
         elif ospath.exists("token.pickle"):
             LOGGER.info("Authorize with token.pickle")
@@ -102,7 +204,12 @@ class GoogleDriveHelper:
                 credentials = pload(f)
         else:
             LOGGER.error("token.pickle not found!")
-        return build("drive", "v3", credentials=credentials, cache_discovery=False)
+            return build(
+                "drive", "v3", credentials=credentials, cache_discovery=False
+            )
+        return build(
+            "drive", "v3", http=PooledHttp(credentials), cache_discovery=False
+        )
 
     def __alt_authorize(self):
         if not self.__alt_auth:
@@ -112,19 +219,57 @@ class GoogleDriveHelper:
                 with open("token.pickle", "rb") as f:
                     credentials = pload(f)
                 return build(
-                    "drive", "v3", credentials=credentials, cache_discovery=False
+                    "drive",
+                    "v3",
+                    http=PooledHttp(credentials),
+                    cache_discovery=False,
                 )
             LOGGER.error("token.pickle not found!")
         return None
 
-    def __switchServiceAccount(self):
+    def __next_service_account(self):
         if self.__sa_index == self.__sa_number - 1:
             self.__sa_index = 0
         else:
             self.__sa_index += 1
         self.__sa_count += 1
         LOGGER.info(f"Switching to {self.__sa_index} index")
-        self.__service = self.__authorize()
+
+    def __switchServiceAccount(self):
+        with self.__sa_lock:
+            self.__next_service_account()
+            sa_index = self.__sa_index
+        self.__service = self.__authorize(sa_index)
+
+    def __get_thread_service(self):
+        # httplib2 isn't thread-safe, so each upload worker builds its own client
+        service = getattr(self.__thread_data, "service", None)
+        if service is None:
+            with self.__sa_lock:
+                sa_index = self.__sa_index
+            self.__thread_data.sa_index = sa_index
+            service = self.__thread_data.service = self.__authorize(sa_index)
+        return service
+
+    def __switch_thread_service(self):
+        with self.__sa_lock:
+            # workers that hit the quota on the same account share one switch
+            if self.__thread_data.sa_index == self.__sa_index:
+                if self.__sa_count >= self.__sa_number:
+                    return False
+                self.__next_service_account()
+            sa_index = self.__sa_index
+        self.__thread_data.sa_index = sa_index
+        self.__thread_data.service = self.__authorize(sa_index)
+        return True
+
+    @staticmethod
+    def __get_error_reason(err):
+        try:
+            error = loads(err.content).get("error", {})
+            return error.get("errors", [{}])[0].get("reason")
+        except (JSONDecodeError, IndexError, AttributeError):
+            return None
 
     @staticmethod
     def getIdFromUrl(link):
@@ -200,15 +345,12 @@ class GoogleDriveHelper:
         return files
 
     async def __progress(self):
-        if self.__status is not None:
-            chunk_size = (
-                self.__status.total_size * self.__status.progress()
-                - self.__file_processed_bytes
-            )
-            self.__file_processed_bytes = (
-                self.__status.total_size * self.__status.progress()
-            )
-            self.__processed_bytes += chunk_size
+        if self.__is_uploading:
+            self.__total_time += self.__update_interval
+        elif self.__status is not None:
+            downloaded = self.__status.resumable_progress
+            self.__processed_bytes += downloaded - self.__file_processed_bytes
+            self.__file_processed_bytes = downloaded
             self.__total_time += self.__update_interval
 
     def deletefile(self, link: str):
@@ -237,6 +379,22 @@ class GoogleDriveHelper:
             msg = str(err)
         return msg
 
+    def __add_processed_bytes(self, chunk_size):
+        with self.__processed_lock:
+            self.__processed_bytes += chunk_size
+
+    def __drain_deletions(self):
+        while (file_path := self.__delete_queue.get()) is not None:
+            with contextlib.suppress(OSError):
+                osremove(file_path)
+
+    def __is_excluded(self, name):
+        # check every dotted suffix so filters like "tar.gz" keep working
+        parts = name.lower().split(".")[1:]
+        return any(
+            ".".join(parts[i:]) in self.__extension_filter for i in range(len(parts))
+        )
+
     def upload(self, file_name, size, gdrive_id):
         if not gdrive_id:
             gdrive_id = config_dict["GDRIVE_ID"]
@@ -244,9 +402,16 @@ class GoogleDriveHelper:
         item_path = f"{self.__path}/{file_name}"
         LOGGER.info(f"Uploading: {item_path}")
         self.__updater = SetInterval(self.__update_interval, self.__progress)
+        executor = ThreadPoolExecutor(
+            max_workers=config_dict["GDRIVE_UPLOAD_WORKERS"] or 1
+        )
+        # local files are removed off the upload path once Drive has them
+        deleter = Thread(target=self.__drain_deletions, daemon=True)
+        deleter.start()
+        error = None
         try:
             if ospath.isfile(item_path):
-                if item_path.lower().endswith(tuple(GLOBAL_EXTENSION_FILTER)):
+                if self.__is_excluded(file_name):
                     raise Exception(
                         "This file extension is excluded by extension filter!"
                     )
@@ -264,10 +429,10 @@ class GoogleDriveHelper:
                 dir_id = self.__create_directory(
                     ospath.basename(ospath.abspath(file_name)), gdrive_id
                 )
-                result = self.__upload_dir(item_path, dir_id)
+                result = self.__upload_dir(item_path, dir_id, executor)
                 if result is None:
                     raise Exception("Upload has been manually cancelled!")
-                link = self.__G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(dir_id)
+                link = self.__G_DRIVE_DIR_BASE_DOWNLOAD_URL % dir_id
                 if self.__is_cancelled:
                     return
                 LOGGER.info(f"Uploaded To G-Drive: {file_name}")
@@ -275,15 +440,21 @@ class GoogleDriveHelper:
             if isinstance(err, RetryError):
                 LOGGER.info(f"Total Attempts: {err.last_attempt.attempt_number}")
                 err = err.last_attempt.exception()
-            err = str(err).replace(">", "").replace("<", "")
-            async_to_sync(self.__listener.onUploadError, err)
+            error = str(err).replace(">", "").replace("<", "")
+            self.__is_stopped = True
             self.__is_errored = True
         finally:
             self.__updater.cancel()
+            executor.shutdown(cancel_futures=True)
+            self.__delete_queue.put(None)
+            deleter.join()
+            # workers and deletions must be done before the listener cleans up
+            if error is not None:
+                async_to_sync(self.__listener.onUploadError, error)
             if self.__is_cancelled and not self.__is_errored:
                 if mime_type == "Folder":
                     LOGGER.info("Deleting uploaded data from Drive...")
-                    link = self.__G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(dir_id)
+                    link = self.__G_DRIVE_DIR_BASE_DOWNLOAD_URL % dir_id
                     self.deletefile(link)
                 return
             if self.__is_errored:
@@ -298,29 +469,119 @@ class GoogleDriveHelper:
                 file_name,
             )
 
-    def __upload_dir(self, input_directory, dest_id):
-        list_dirs = listdir(input_directory)
-        if len(list_dirs) == 0:
-            return dest_id
-        new_id = None
-        for item in list_dirs:
-            current_file_name = ospath.join(input_directory, item)
-            if ospath.isdir(current_file_name):
-                current_dir_id = self.__create_directory(item, dest_id)
-                new_id = self.__upload_dir(current_file_name, current_dir_id)
-                self.__total_folders += 1
-            elif not item.lower().endswith(tuple(GLOBAL_EXTENSION_FILTER)):
-                mime_type = get_mime_type(current_file_name)
-                file_name = current_file_name.split("/")[-1]
-                self.__upload_file(current_file_name, file_name, mime_type, dest_id)
+    def __upload_dir(self, input_directory, dest_id, executor):
+        futures = []
+        pending = deque([(input_directory, dest_id)])
+        while pending and not (self.__is_cancelled or self.__is_stopped):
+            directory, parent_id = pending.popleft()
+            with scandir(directory) as it:
+                entries = list(it)
+            if folders := [entry for entry in entries if entry.is_dir()]:
+                folder_ids = self.__create_directories(
+                    [entry.name for entry in folders], parent_id
+                )
+                pending.extend(
+                    (entry.path, folder_id)
+                    for entry, folder_id in zip(folders, folder_ids)
+                )
+                self.__total_folders += len(folders)
+            for entry in entries:
+                if entry.is_dir():
+                    continue
+                if not self.__is_excluded(entry.name):
+                    mime_type = get_mime_type(entry.path)
+                    futures.append(
+                        executor.submit(
+                            self.__upload_worker,
+                            entry.path,
+                            entry.name,
+                            mime_type,
+                            parent_id,
+                        )
+                    )
+                else:
+                    self.__delete_queue.put(entry.path)
+                if self.__is_cancelled or self.__is_stopped:
+                    break
+        try:
+            for future in as_completed(futures):
+                future.result()
                 self.__total_files += 1
-                new_id = dest_id
-            else:
-                osremove(current_file_name)
-                new_id = "filter"
-            if self.__is_cancelled:
-                break
-        return new_id
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+        return dest_id
+
+    def __upload_worker(self, *args):
+        try:
+            return self.__upload_file(*args)
+        except Exception:
+            # one failed file fails the task, so stop the walk and other workers
+            self.__is_stopped = True
+            raise
+
+    def __directory_metadata(self, directory_name, dest_id):
+        file_metadata = {
+            "name": directory_name,
+            "description": "Uploaded by Aeon",
+            "mimeType": self.__G_DRIVE_DIR_MIME_TYPE,
+        }
+        if dest_id is not None:
+            file_metadata["parents"] = [dest_id]
+        return file_metadata
+
+    def __create_directories(self, directory_names, dest_id):
+        if len(directory_names) == 1:
+            return [self.__create_directory(directory_names[0], dest_id)]
+        created = {}
+
+        def callback(request_id, response, exception):
+            if exception is None:
+                created[request_id] = response["id"]
+                LOGGER.info(
+                    f'Created G-Drive Folder:\nName: {response["name"]}\nID: {response["id"]}'
+                )
+
+        # schedule every rename on the bot loop at once instead of one at a time
+        renames = [
+            async_to_sync(
+                process_file, name, self.__user_id, is_mirror=True, wait=False
+            )
+            for name in directory_names
+        ]
+        processed_names = [rename.result()[0] for rename in renames]
+        # Drive accepts up to 100 calls in one batch request
+        for start in range(0, len(directory_names), 100):
+            batch = self.__service.new_batch_http_request(callback=callback)
+            for index in range(start, min(start + 100, len(directory_names))):
+                batch.add(
+                    self.__service.files().create(
+                        body=self.__directory_metadata(
+                            processed_names[index], dest_id
+                        ),
+                        supportsAllDrives=True,
+                        fields="id, name",
+                    ),
+                    request_id=str(index),
+                )
+            try:
+                batch.execute()
+            except (
+                HttpError,
+                ConnectionError,
+                TimeoutError,
+                RequestsConnectionError,
+                Timeout,
+            ) as err:
+                LOGGER.warning(
+                    f"Batch folder creation failed, creating one by one: {err}"
+                )
+        # anything the batch rejected is retried on its own with the usual backoff
+        return [
+            created.get(str(index)) or self.__create_directory(name, dest_id)
+            for index, name in enumerate(directory_names)
+        ]
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
@@ -331,13 +592,7 @@ class GoogleDriveHelper:
         directory_name, _ = async_to_sync(
             process_file, directory_name, self.__user_id, is_mirror=True
         )
-        file_metadata = {
-            "name": directory_name,
-            "description": "Uploaded by Aeon",
-            "mimeType": self.__G_DRIVE_DIR_MIME_TYPE,
-        }
-        if dest_id is not None:
-            file_metadata["parents"] = [dest_id]
+        file_metadata = self.__directory_metadata(directory_name, dest_id)
         file = (
             self.__service.files()
             .create(body=file_metadata, supportsAllDrives=True)
@@ -350,17 +605,23 @@ class GoogleDriveHelper:
         return file_id
 
     @retry(
-        wait=wait_exponential(multiplier=2, min=3, max=6),
-        stop=stop_after_attempt(3),
-        retry=(retry_if_exception_type(Exception)),
+        wait=wait_random_exponential(multiplier=1, max=60),
+        stop=stop_after_attempt(5),
+        retry=retry_if_exception(is_transient_error),
+        reraise=True,
     )
     def __upload_file(self, file_path, file_name, mime_type, dest_id, is_dir=True):
+        if self.__is_cancelled or self.__is_stopped:
+            return None
+        service = self.__get_thread_service()
         location = ospath.dirname(file_path)
         file_name, _ = async_to_sync(
             process_file, file_name, self.__user_id, location, True
         )
         if (atc := self.__listener.attachment) and is_mkv(file_name):
             file_name = async_to_sync(add_attachment, file_name, location, atc)
+        # measured after the edits above, which can rewrite mkv files in place
+        size = ospath.getsize(file_path)
         file_metadata = {
             "name": file_name,
             "description": "Uploaded by Aeon",
@@ -369,79 +630,117 @@ class GoogleDriveHelper:
         if dest_id is not None:
             file_metadata["parents"] = [dest_id]
 
-        if ospath.getsize(file_path) == 0:
-            media_body = MediaFileUpload(
-                file_path, mimetype=mime_type, resumable=False
-            )
+        if size == 0:
+            # an empty file needs no media, so skip the upload endpoint entirely
             response = (
-                self.__service.files()
-                .create(
-                    body=file_metadata, media_body=media_body, supportsAllDrives=True
-                )
+                service.files()
+                .create(body=file_metadata, supportsAllDrives=True, fields="id")
                 .execute()
             )
-            drive_file = (
-                self.__service.files()
-                .get(fileId=response["id"], supportsAllDrives=True)
-                .execute()
-            )
-            return self.__G_DRIVE_BASE_DOWNLOAD_URL.format(drive_file.get("id"))
-        media_body = MediaFileUpload(
-            file_path,
-            mimetype=mime_type,
-            resumable=True,
-            chunksize=100 * 1024 * 1024,
+            return self.__G_DRIVE_BASE_DOWNLOAD_URL % response["id"]
+        # ~1/8 of the file per chunk, a power of two so it stays 256 KiB aligned
+        chunk_size = max(
+            8 * 1024 * 1024, min(256 * 1024 * 1024, (1 << size.bit_length()) >> 3)
         )
+        # small files go up in one multipart request, no upload session needed
+        resumable = size > 5 * 1024 * 1024
+        with open(file_path, "rb") as f:
+            file_map = mmap(f.fileno(), 0, access=ACCESS_READ)
+        uploaded = 0
+        try:
+            file_map.madvise(MADV_SEQUENTIAL)
+            media_body = MediaIoBaseUpload(
+                file_map,
+                mimetype=mime_type,
+                resumable=resumable,
+                chunksize=chunk_size,
+            )
 
-        drive_file = self.__service.files().create(
-            body=file_metadata, media_body=media_body, supportsAllDrives=True
-        )
-        response = None
-        retries = 0
-        while response is None and not self.__is_cancelled:
-            try:
-                self.__status, response = drive_file.next_chunk()
-            except HttpError as err:
-                if err.resp.status in [500, 502, 503, 504] and retries < 10:
-                    retries += 1
-                    continue
-                if err.resp.get("content-type", "").startswith("application/json"):
-                    reason = (
-                        eval(err.content).get("error").get("errors")[0].get("reason")
+            drive_file = service.files().create(
+                body=file_metadata,
+                media_body=media_body,
+                supportsAllDrives=True,
+                fields="id",
+            )
+            response = None
+            retries = 0
+            while response is None and not (
+                self.__is_cancelled or self.__is_stopped
+            ):
+                try:
+                    # page in this chunk and the next one while this one is sent
+                    offset = drive_file.resumable_progress
+                    file_map.madvise(
+                        MADV_WILLNEED, offset - offset % PAGESIZE, 2 * chunk_size
                     )
-                    if reason not in [
-                        "userRateLimitExceeded",
-                        "dailyLimitExceeded",
-                    ]:
-                        raise err
-                    if config_dict["USE_SERVICE_ACCOUNTS"]:
-                        if self.__sa_count >= self.__sa_number:
-                            LOGGER.info(
-                                f"Reached maximum number of service accounts switching, which is {self.__sa_count}"
-                            )
-                            raise err
-                        if self.__is_cancelled:
-                            return None
-                        self.__switchServiceAccount()
-                        LOGGER.info(f"Got: {reason}, Trying Again.")
-                        return self.__upload_file(
-                            file_path, file_name, mime_type, dest_id
+                    if not resumable:
+                        response = drive_file.execute()
+                        break
+                    status, response = drive_file.next_chunk()
+                    retries = 0
+                    if status is not None:
+                        self.__add_processed_bytes(
+                            status.resumable_progress - uploaded
                         )
-                    LOGGER.error(f"Got: {reason}")
+                        uploaded = status.resumable_progress
+                except HttpError as err:
+                    if (
+                        err.resp.status in TRANSIENT_STATUSES
+                        and retries < CHUNK_RETRIES
+                        and self.__get_error_reason(err) not in QUOTA_REASONS
+                    ):
+                        # resend this chunk in the same session, quota errors
+                        # go straight to the service account switch below
+                        retries += 1
+                        sleep(random() * 2**retries)
+                        continue
+                    if err.resp.get("content-type", "").startswith(
+                        "application/json"
+                    ):
+                        reason = self.__get_error_reason(err)
+                        if reason not in QUOTA_REASONS:
+                            raise err
+                        if config_dict["USE_SERVICE_ACCOUNTS"]:
+                            if self.__is_cancelled:
+                                return None
+                            if not self.__switch_thread_service():
+                                LOGGER.info(
+                                    f"Reached maximum number of service accounts switching, which is {self.__sa_count}"
+                                )
+                                raise err
+                            LOGGER.info(f"Got: {reason}, Trying Again.")
+                            # resume the same session instead of starting over
+                            resumed = drive_file
+                            drive_file = (
+                                self.__get_thread_service()
+                                .files()
+                                .create(
+                                    body=file_metadata,
+                                    media_body=media_body,
+                                    supportsAllDrives=True,
+                                    fields="id",
+                                )
+                            )
+                            drive_file.resumable_uri = resumed.resumable_uri
+                            drive_file.resumable_progress = (
+                                resumed.resumable_progress
+                            )
+                            continue
+                        LOGGER.error(f"Got: {reason}")
+                        raise err
                     raise err
-        if self.__is_cancelled:
+        except Exception:
+            self.__add_processed_bytes(-uploaded)
+            raise
+        finally:
+            file_map.close()
+        if self.__is_cancelled or self.__is_stopped:
             return None
+        self.__add_processed_bytes(size - uploaded)
         if not self.__listener.seed or self.__listener.newDir:
-            with contextlib.suppress(Exception):
-                osremove(file_path)
-        self.__file_processed_bytes = 0
+            self.__delete_queue.put(file_path)
         if not is_dir:
-            drive_file = (
-                self.__service.files()
-                .get(fileId=response["id"], supportsAllDrives=True)
-                .execute()
-            )
-            return self.__G_DRIVE_BASE_DOWNLOAD_URL.format(drive_file.get("id"))
+            return self.__G_DRIVE_BASE_DOWNLOAD_URL % response["id"]
         return None
 
     def clone(self, link, gdrive_id):
@@ -465,7 +764,7 @@ class GoogleDriveHelper:
                 self.__cloneFolder(
                     meta.get("name"), meta.get("name"), meta.get("id"), dir_id
                 )
-                durl = self.__G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(dir_id)
+                durl = self.__G_DRIVE_DIR_BASE_DOWNLOAD_URL % dir_id
                 if self.__is_cancelled:
                     LOGGER.info("Deleting cloned data from Drive...")
                     self.deletefile(durl)
@@ -475,7 +774,7 @@ class GoogleDriveHelper:
             else:
                 file = self.__copyFile(meta.get("id"), gdrive_id, meta.get("name"))
                 msg += f'<b>Name: </b><code>{file.get("name")}</code>'
-                durl = self.__G_DRIVE_BASE_DOWNLOAD_URL.format(file.get("id"))
+                durl = self.__G_DRIVE_BASE_DOWNLOAD_URL % file.get("id")
                 if mime_type is None:
                     mime_type = "File"
                 size = int(meta.get("size", 0))
@@ -513,9 +812,7 @@ class GoogleDriveHelper:
                 self.__cloneFolder(
                     file.get("name"), file_path, file.get("id"), current_dir_id
                 )
-            elif (
-                not file.get("name").lower().endswith(tuple(GLOBAL_EXTENSION_FILTER))
-            ):
+            elif not self.__is_excluded(file.get("name")):
                 self.__total_files += 1
                 self.__copyFile(file.get("id"), dest_id, file.get("name"))
                 self.__processed_bytes += int(file.get("size", 0))
@@ -542,17 +839,11 @@ class GoogleDriveHelper:
             )
         except HttpError as err:
             if err.resp.get("content-type", "").startswith("application/json"):
-                reason = (
-                    eval(err.content).get("error").get("errors")[0].get("reason")
-                )
-                if reason not in [
-                    "userRateLimitExceeded",
-                    "dailyLimitExceeded",
-                    "cannotCopyFile",
-                ]:
-                    raise err
+                reason = self.__get_error_reason(err)
                 if reason == "cannotCopyFile":
                     LOGGER.error(err)
+                elif reason not in QUOTA_REASONS:
+                    raise err
                 elif config_dict["USE_SERVICE_ACCOUNTS"]:
                     if self.__sa_count >= self.__sa_number:
                         LOGGER.info(
@@ -710,9 +1001,7 @@ class GoogleDriveHelper:
             for file in response.get("files", []):
                 mime_type = file.get("mimeType")
                 if mime_type == self.__G_DRIVE_DIR_MIME_TYPE:
-                    furl = self.__G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(
-                        file.get("id")
-                    )
+                    furl = self.__G_DRIVE_DIR_BASE_DOWNLOAD_URL % file.get("id")
                     msg += f"<code>{file.get('name')}<br>(folder)</code><br>"
                     msg += f"<b><a href={furl}>Drive Link</a></b>"
                     if index_url:
@@ -728,12 +1017,10 @@ class GoogleDriveHelper:
                         url = f"{index_url}/{url_path}/"
                         msg += f' <b><a href="{url}">Index Link</a></b>'
                 elif mime_type == "application/vnd.google-apps.shortcut":
-                    furl = self.__G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(
-                        file.get("id")
-                    )
+                    furl = self.__G_DRIVE_DIR_BASE_DOWNLOAD_URL % file.get("id")
                     msg += f"⁍<a href='{furl}'>{file.get('name')}</a> (shortcut)"
                 else:
-                    furl = self.__G_DRIVE_BASE_DOWNLOAD_URL.format(file.get("id"))
+                    furl = self.__G_DRIVE_BASE_DOWNLOAD_URL % file.get("id")
                     msg += f"<code>{file.get('name')}<br>({get_readable_file_size(int(file.get('size', 0)))})</code><br>"
                     msg += f"<b><a href={furl}>Drive Link</a></b>"
                     if index_url:
@@ -891,9 +1178,9 @@ class GoogleDriveHelper:
                 mime_type = item.get("mimeType")
             if mime_type == self.__G_DRIVE_DIR_MIME_TYPE:
                 self.__download_folder(file_id, path, filename)
-            elif not ospath.isfile(
-                f"{path}{filename}"
-            ) and not filename.lower().endswith(tuple(GLOBAL_EXTENSION_FILTER)):
+            elif not ospath.isfile(f"{path}{filename}") and not self.__is_excluded(
+                filename
+            ):
                 self.__download_file(file_id, path, filename, mime_type)
             if self.__is_cancelled:
                 break
@@ -926,17 +1213,12 @@ class GoogleDriveHelper:
             try:
                 self.__status, done = downloader.next_chunk()
             except HttpError as err:
-                if err.resp.status in [500, 502, 503, 504] and retries < 10:
+                if err.resp.status in TRANSIENT_STATUSES and retries < 10:
                     retries += 1
                     continue
                 if err.resp.get("content-type", "").startswith("application/json"):
-                    reason = (
-                        eval(err.content).get("error").get("errors")[0].get("reason")
-                    )
-                    if reason not in [
-                        "downloadQuotaExceeded",
-                        "dailyLimitExceeded",
-                    ]:
+                    reason = self.__get_error_reason(err)
+                    if reason not in DOWNLOAD_QUOTA_REASONS:
                         raise err
                     if config_dict["USE_SERVICE_ACCOUNTS"]:
                         if self.__sa_count >= self.__sa_number:
@@ -52,6 +52,7 @@ default_values = {
     "SEARCH_LIMIT": 0,
     "UPSTREAM_BRANCH": "main",
     "TORRENT_TIMEOUT": 3000,
+    "GDRIVE_UPLOAD_WORKERS": 4,
 }
 bool_vars = [
     "AS_DOCUMENT",
@@ -199,6 +200,11 @@ async def load_config():
             await DbManager().update_aria2("bt-stop-timeout", TORRENT_TIMEOUT)
         TORRENT_TIMEOUT = int(TORRENT_TIMEOUT)
 
+    GDRIVE_UPLOAD_WORKERS = environ.get("GDRIVE_UPLOAD_WORKERS", "")
+    GDRIVE_UPLOAD_WORKERS = (
+        4 if len(GDRIVE_UPLOAD_WORKERS) == 0 else int(GDRIVE_UPLOAD_WORKERS)
+    )
+
     QUEUE_ALL = environ.get("QUEUE_ALL", "")
     QUEUE_ALL = "" if len(QUEUE_ALL) == 0 else int(QUEUE_ALL)
 
@@ -365,6 +371,7 @@ async def load_config():
             "EXTENSION_FILTER": EXTENSION_FILTER,
             "ATTACHMENT_URL": ATTACHMENT_URL,
             "GDRIVE_ID": GDRIVE_ID,
+            "GDRIVE_UPLOAD_WORKERS": GDRIVE_UPLOAD_WORKERS,
             "INDEX_URL": INDEX_URL,
             "LEECH_LOG_ID": LEECH_LOG_ID,
             "TOKEN_TIMEOUT": TOKEN_TIMEOUT,